@@ -192,6 +192,7 @@ def index():
                     <a href="/playlist.m3u" class="btn">📥 Playlist M3U</a>
                     <a href="/channels" class="btn" style="background: #9C27B0;">📊 API JSON</a>
                     <a href="/epg.xml" class="btn" style="background: #FF9800;">📺 Guia de Programação (EPG)</a>
+                    <a href="/epg/report" class="btn" style="background: #795548;">⏱️ Relatório do EPG</a>
                     <a href="/health" class="btn" style="background: #607D8B;">🩺 Health Check</a>
                 </p>
                 <p style="margin-top: 15px;">
@@ -411,6 +412,19 @@ def epg():
     except:
         return "EPG não disponível. Execute epg.py primeiro.", 404
 
+@app.route("/epg/report")
+def epg_report():
+    """Último relatório de perfil gerado pelo epg.py (EPG_PROFILE=1)"""
+    try:
+        with open('epg_report.json', 'r', encoding='utf-8') as f:
+            return jsonify(json.load(f))
+    except FileNotFoundError:
+        return jsonify({
+            "error": "Relatório não disponível. Execute EPG_PROFILE=1 python epg.py primeiro."
+        }), 404
+    except ValueError as e:
+        return jsonify({"error": f"Relatório inválido: {e}"}), 500
+
 # ===============================
 # HEALTH CHECK
 # ===============================
@@ -6,6 +6,18 @@ import xml.etree.ElementTree as ET
 from pathlib import Path
 import json
 import time
+import os
+import sys
+import cProfile
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 # =============================
 # CONFIGURAÇÃO
@@ -26,9 +38,129 @@ EPG_SOURCES = [
 ]
 
 OUTPUT = Path("epg.xml")
+REPORT = OUTPUT.with_name("epg_report.json")
 TMP = Path("tmp_epg")
 TMP.mkdir(exist_ok=True)
 
+# Perfilamento opcional: EPG_PROFILE=1 gera o relatório por etapa;
+# "cprofile" e/ou "tracemalloc" (separados por vírgula) ativam os dumps.
+EPG_PROFILE = os.environ.get("EPG_PROFILE", "")
+
+# =============================
+# PERFILAMENTO
+# =============================
+
+def max_rss_kb():
+    """Pico de memória residente do processo (KB), se disponível"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reporta em bytes, Linux em KB
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+class EPGProfiler:
+    """Registra tempo, bytes, elementos e memória por fonte e por etapa"""
+
+    def __init__(self, mode=EPG_PROFILE):
+        flags = {m.strip().lower() for m in mode.split(",") if m.strip()}
+        flags -= {"0", "false", "no", "off"}
+        self.enabled = bool(flags)
+        self.use_cprofile = "cprofile" in flags
+        self.use_tracemalloc = "tracemalloc" in flags
+        self.stages = []
+        self.sources = {}
+        self._profile = None
+        self._started_at = None
+        self._t0 = None
+
+    def start(self):
+        """Inicia a coleta (no-op se o perfilamento estiver desligado)"""
+        if not self.enabled:
+            return
+        self._started_at = datetime.now().isoformat()
+        self._t0 = time.perf_counter()
+        if self.use_tracemalloc:
+            tracemalloc.start()
+        if self.use_cprofile:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def source(self, src):
+        """Retorna (criando) o registro de uma fonte EPG"""
+        return self.sources.setdefault(src, {"url": src, "status": "ok", "stages": []})
+
+    @contextmanager
+    def stage(self, name, src=None):
+        """Mede uma etapa; o chamador preenche métricas no dict retornado"""
+        metrics = {}
+        if not self.enabled:
+            yield metrics
+            return
+
+        if self.use_tracemalloc:
+            tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        entry = {"stage": name, "status": "ok"}
+        try:
+            yield metrics
+        except Exception as e:
+            entry["status"] = "error"
+            entry["error"] = str(e)
+            if src is not None:
+                self.source(src)["status"] = "error"
+            raise
+        finally:
+            entry["wall_s"] = round(time.perf_counter() - t0, 4)
+            entry.update(metrics)
+            if self.use_tracemalloc:
+                entry["py_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            entry["max_rss_kb"] = max_rss_kb()
+            target = self.stages if src is None else self.source(src)["stages"]
+            target.append(entry)
+
+    def finish(self, summary):
+        """Para a coleta e grava o relatório JSON (e dumps) ao lado do EPG"""
+        if not self.enabled:
+            return None
+
+        if self._profile is not None:
+            self._profile.disable()
+            prof_path = OUTPUT.with_name("epg_profile.prof")
+            self._profile.dump_stats(prof_path)
+            with open(OUTPUT.with_name("epg_profile.txt"), "w") as f:
+                pstats.Stats(self._profile, stream=f).sort_stats("cumulative").print_stats(40)
+
+        tracemalloc_top = None
+        if self.use_tracemalloc:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            tracemalloc_top = [str(stat) for stat in snapshot.statistics("lineno")[:25]]
+            OUTPUT.with_name("epg_tracemalloc.txt").write_text(
+                "\n".join(tracemalloc_top) + "\n", encoding="utf-8"
+            )
+
+        report = {
+            "started_at": self._started_at,
+            "finished_at": datetime.now().isoformat(),
+            "wall_s": round(time.perf_counter() - self._t0, 4),
+            "max_rss_kb": max_rss_kb(),
+            "profile": {
+                "cprofile": self.use_cprofile,
+                "tracemalloc": self.use_tracemalloc,
+            },
+            "summary": summary,
+            "stages": self.stages,
+            "sources": list(self.sources.values()),
+        }
+        if tracemalloc_top is not None:
+            report["tracemalloc_top"] = tracemalloc_top
+
+        # Escrita atômica: app.py pode estar lendo o relatório anterior
+        tmp_path = REPORT.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, REPORT)
+        return REPORT
+
 # =============================
 # CARREGAR IDs TVG USADOS
 # =============================
@@ -72,9 +204,12 @@ def load_used_tvg_ids():
 # BAIXAR E PROCESSAR EPG
 # =============================
 
-def download_and_process():
+def download_and_process(profiler=None):
     """Baixa e processa todas as fontes EPG"""
-    USED_CHANNELS = load_used_tvg_ids()
+    profiler = profiler or EPGProfiler("")
+    with profiler.stage("load_tvg_ids") as m:
+        USED_CHANNELS = load_used_tvg_ids()
+        m["tvg_ids"] = len(USED_CHANNELS)
     print(f"🎯 Buscando EPG para {len(USED_CHANNELS)} canais")
     
     root = ET.Element("tv")
@@ -90,35 +225,55 @@ def download_and_process():
             print(f"\n[{idx}/{len(EPG_SOURCES)}] ⬇️ Baixando {src}")
             
             # Baixar arquivo
-            r = requests.get(src, timeout=30)
-            r.raise_for_status()
-            gz_path.write_bytes(r.content)
+            with profiler.stage("download", src) as m:
+                r = requests.get(src, timeout=30)
+                m["http_status"] = r.status_code
+                r.raise_for_status()
+                gz_path.write_bytes(r.content)
+                m["bytes"] = len(r.content)
             
             # Descompactar se for .gz
-            if src.endswith('.gz'):
-                with gzip.open(gz_path, "rb") as f_in, open(xml_path, "wb") as f_out:
-                    shutil.copyfileobj(f_in, f_out)
-            else:
-                xml_path.write_bytes(r.content)
+            with profiler.stage("decompress", src) as m:
+                if src.endswith('.gz'):
+                    with gzip.open(gz_path, "rb") as f_in, open(xml_path, "wb") as f_out:
+                        shutil.copyfileobj(f_in, f_out)
+                else:
+                    xml_path.write_bytes(r.content)
+                m["bytes_in"] = len(r.content)
+                m["bytes_out"] = xml_path.stat().st_size
             
             # Processar XML
             try:
-                tree = ET.parse(xml_path)
-                tv = tree.getroot()
+                with profiler.stage("parse", src) as m:
+                    tree = ET.parse(xml_path)
+                    tv = tree.getroot()
+                    m["elements"] = len(tv)
                 
                 # Adicionar canais
-                for ch in tv.findall("channel"):
-                    ch_id = ch.attrib.get("id")
-                    if ch_id in USED_CHANNELS and ch_id not in channels_added:
-                        root.append(ch)
-                        channels_added.add(ch_id)
+                with profiler.stage("filter_channels", src) as m:
+                    scanned = kept = 0
+                    for ch in tv.findall("channel"):
+                        scanned += 1
+                        ch_id = ch.attrib.get("id")
+                        if ch_id in USED_CHANNELS and ch_id not in channels_added:
+                            root.append(ch)
+                            channels_added.add(ch_id)
+                            kept += 1
+                    m["scanned"] = scanned
+                    m["kept"] = kept
                 
                 # Adicionar programas
-                for pr in tv.findall("programme"):
-                    pr_channel = pr.attrib.get("channel")
-                    if pr_channel in USED_CHANNELS:
-                        root.append(pr)
-                        programmes_added += 1
+                with profiler.stage("filter_programmes", src) as m:
+                    scanned = kept = 0
+                    for pr in tv.findall("programme"):
+                        scanned += 1
+                        pr_channel = pr.attrib.get("channel")
+                        if pr_channel in USED_CHANNELS:
+                            root.append(pr)
+                            programmes_added += 1
+                            kept += 1
+                    m["scanned"] = scanned
+                    m["kept"] = kept
                 
                 print(f"   ✅ Processado: {len(channels_added)} canais, {programmes_added} programas")
                 
@@ -181,23 +336,40 @@ def main():
     print("=" * 60)
     
     start_time = time.time()
+    profiler = EPGProfiler()
+    profiler.start()
     
     # Baixar e processar EPG
-    root, channels_count, programmes_count = download_and_process()
+    root, channels_count, programmes_count = download_and_process(profiler)
     
     # Adicionar fallback para canais sem dados
-    root = create_fallback_epg(root, set())
+    with profiler.stage("fallback") as m:
+        before = len(root)
+        root = create_fallback_epg(root, set())
+        m["elements_added"] = len(root) - before
     
     # Salvar arquivo final
-    ET.ElementTree(root).write(
-        OUTPUT,
-        encoding="utf-8",
-        xml_declaration=True,
-        short_empty_elements=False
-    )
+    with profiler.stage("write") as m:
+        ET.ElementTree(root).write(
+            OUTPUT,
+            encoding="utf-8",
+            xml_declaration=True,
+            short_empty_elements=False
+        )
+        m["elements"] = len(root)
+        m["bytes"] = OUTPUT.stat().st_size
     
     elapsed = time.time() - start_time
     
+    report_path = profiler.finish({
+        "channels": channels_count,
+        "programmes": programmes_count,
+        "sources": len(EPG_SOURCES),
+        "sources_failed": sum(1 for s in profiler.sources.values() if s["status"] == "error"),
+        "output": str(OUTPUT),
+        "output_bytes": OUTPUT.stat().st_size,
+    })
+    
     print("\n" + "=" * 60)
     print("✅ EPG GERADO COM SUCESSO!")
     print("=" * 60)
@@ -207,6 +379,8 @@ def main():
     print(f"   • Arquivo: {OUTPUT} ({OUTPUT.stat().st_size / 1024:.1f} KB)")
     print(f"   • Tempo total: {elapsed:.1f} segundos")
     print(f"   • Fontes processadas: {len(EPG_SOURCES)}")
+    if report_path:
+        print(f"   • Relatório de perfil: {report_path}")
     print("=" * 60)
     print("\n📌 Para usar no IPTV Player:")
     print(f"   URL do EPG: http://seu-servidor/epg.xml")